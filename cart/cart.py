@@ -1,7 +1,13 @@
+from contextlib import contextmanager
 from decimal import Decimal
+from functools import cached_property
 from django.conf import settings
+from django.core.cache import cache
 from shop.models import Product
-from coupons.models import Coupon
+from coupons.models import Coupon, coupon_cache_key
+
+# seconds a resolved coupon is kept in the cache
+COUPON_CACHE_TIMEOUT = 300
 
 
 class Cart:
@@ -10,35 +16,73 @@ class Cart:
         Initialize the cart.
         """
         self.session = request.session
-        cart = self.session.get(settings.CART_SESSION_ID)
-        if not cart:
-            # save an empty cart in the session
-            cart = self.session[settings.CART_SESSION_ID] = {}
-        self.cart = cart
+        # item count and totals cached until the cart is modified
+        self._len = None
+        self._totals = None
+        # Decimal prices built from the stored cents, keyed by product id
+        self._decimal_prices = {}
+        # set while mutations are grouped with batch()
+        self._batching = False
+        self.dirty = False
         # store current applied coupon
         self.coupon_id = self.session.get('coupon_id')
 
+    @cached_property
+    def cart(self):
+        """
+        The cart items keyed by product id, built from the compact
+        [product_id, quantity, price_cents] rows kept in the session.
+        """
+        rows = self.session.get(settings.CART_SESSION_ID) or []
+        if isinstance(rows, dict):
+            # cart stored in the older {product_id: item} format
+            rows = [[product_id, item['quantity'],
+                     item['price_cents'] if 'price_cents' in item
+                     else int(Decimal(item['price']) * 100)]
+                    for product_id, item in rows.items()]
+        return {str(product_id): {'quantity': quantity,
+                                  'price_cents': price_cents}
+                for product_id, quantity, price_cents in rows}
+
     def __iter__(self):
         """
         Iterate over the items in the cart and get the products
         from the database.
         """
-        product_ids = self.cart.keys()
-        # get the product objects and add them to the cart
-        products = Product.objects.filter(id__in=product_ids)
-        cart = self.cart.copy()
-        for product in products:
-            cart[str(product.id)]['product'] = product
-        for item in cart.values():
-            item['price'] = Decimal(item['price'])
-            item['total_price'] = item['price'] * item['quantity']
-            yield item
+        if not self.cart:
+            return
+        # get the product objects mapped by id, loading only the
+        # columns needed to render a cart row
+        products = Product.objects.only('id', 'name', 'slug', 'image') \
+                                  .in_bulk([int(product_id)
+                                            for product_id in self.cart])
+        missing = [product_id for product_id in self.cart
+                   if int(product_id) not in products]
+        if missing:
+            # drop products that no longer exist, so the item count
+            # and totals match the items listed
+            for product_id in missing:
+                del self.cart[product_id]
+                self._decimal_prices.pop(product_id, None)
+            self.save()
+        for product_id, item in self.cart.items():
+            product = products[int(product_id)]
+            price = self._price(product_id, item['price_cents'])
+            yield {'product': product,
+                   'price': price,
+                   'quantity': item['quantity'],
+                   'total_price': price * item['quantity']}
 
     def __len__(self):
         """
         Count all items in the cart.
         """
-        return sum(item['quantity'] for item in self.cart.values())
+        if not self.cart:
+            return 0
+        if self._len is None:
+            self._len = sum(item['quantity']
+                            for item in self.cart.values())
+        return self._len
 
     def add(self, product, quantity=1, override_quantity=False):
         """
@@ -47,7 +91,8 @@ class Cart:
         product_id = str(product.id)
         if product_id not in self.cart:
             self.cart[product_id] = {'quantity': 0,
-                                     'price': str(product.price)}
+                                     'price_cents': int(product.price * 100)}
+            self._decimal_prices.pop(product_id, None)
         if override_quantity:
             self.cart[product_id]['quantity'] = quantity
         else:
@@ -55,42 +100,115 @@ class Cart:
         self.save()
 
     def save(self):
-        # mark the session as "modified" to make sure it gets saved
-        self.session.modified = True
+        # contents changed, drop the cached count and totals
+        self._len = None
+        self._totals = None
+        if self._batching:
+            # the session is written once when the batch ends
+            self.dirty = True
+        else:
+            self._store()
+
+    def _store(self):
+        # write the cart back to the session as compact rows,
+        # which also marks the session as modified
+        self.session[settings.CART_SESSION_ID] = [
+            [int(product_id), item['quantity'], item['price_cents']]
+            for product_id, item in self.cart.items()]
+
+    @contextmanager
+    def batch(self):
+        """
+        Group several mutations so the cart is written to the
+        session only once, when the block exits.
+        """
+        self._batching = True
+        try:
+            yield self
+        finally:
+            self._batching = False
+            if self.dirty:
+                self.dirty = False
+                self._store()
 
     def remove(self, product):
         """
-        Remove a product from the cart.
+        Remove a product from the cart. Accepts a product or its id.
         """
-        product_id = str(product.id)
+        product_id = str(getattr(product, 'id', product))
         if product_id in self.cart:
             del self.cart[product_id]
+            self._decimal_prices.pop(product_id, None)
             self.save()
 
     def clear(self):
-        # remove cart from session
-        del self.session[settings.CART_SESSION_ID]
+        # empty the cart
+        self.cart = {}
+        self._decimal_prices.clear()
         self.save()
 
+    def _price(self, product_id, cents):
+        """
+        Return the Decimal price of a cart item, building it only once.
+        """
+        price = self._decimal_prices.get(product_id)
+        if price is None:
+            price = self._decimal_prices[product_id] = \
+                Decimal(cents).scaleb(-2)
+        return price
+
+    def totals(self):
+        """
+        Return the subtotal, the discount and the total after discount,
+        computed in a single pass over the cart.
+        """
+        if not self.cart:
+            # nothing to sum and no coupon to look up
+            return (Decimal(0), Decimal(0), Decimal(0))
+        if self._totals is None:
+            # sum in integer cents, convert to Decimal once
+            total_cents = sum(item['price_cents'] * item['quantity']
+                              for item in self.cart.values())
+            subtotal = Decimal(total_cents).scaleb(-2)
+            coupon = self.coupon
+            if coupon:
+                discount = (coupon.discount / Decimal(100)) * subtotal
+            else:
+                discount = Decimal(0)
+            self._totals = (subtotal, discount, subtotal - discount)
+        return self._totals
+
     def get_total_price(self):
-        return sum(Decimal(item['price']) * item['quantity'] for item in self.cart.values())
+        return self.totals()[0]
 
     @property
+    def coupon_id(self):
+        return self._coupon_id
+
+    @coupon_id.setter
+    def coupon_id(self, value):
+        self._coupon_id = value
+        # forget the coupon resolved for the previous id
+        self.__dict__.pop('coupon', None)
+        self._totals = None
+
+    @cached_property
     def coupon(self):
-        if self.coupon_id:
-            try:
-                return Coupon.objects.get(id=self.coupon_id)
-            except Coupon.DoesNotExist:
-                pass
-        return None
+        if not self.coupon_id:
+            return None
+        key = coupon_cache_key(self.coupon_id)
+        coupon = cache.get(key)
+        if coupon is None:
+            coupon = Coupon.objects.filter(id=self.coupon_id).first()
+            if coupon is None:
+                return None
+            cache.set(key, coupon, COUPON_CACHE_TIMEOUT)
+        return coupon
 
     def get_discount(self):
-        if self.coupon:
-            return (self.coupon.discount / Decimal(100)) \
-                * self.get_total_price()
-        return Decimal(0)
+        return self.totals()[1]
 
     def get_total_price_after_discount(self):
-        return self.get_total_price() - self.get_discount()
+        return self.totals()[2]
 
 
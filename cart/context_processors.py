@@ -1,5 +1,7 @@
+from django.utils.functional import SimpleLazyObject
 from .cart import Cart
 
 
 def cart(request):
-    return {'cart': Cart(request)}
+    # only build the cart when a template actually uses it
+    return {'cart': SimpleLazyObject(lambda: Cart(request))}
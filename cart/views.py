@@ -2,14 +2,15 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_POST
 from shop.models import Product
 from .cart import Cart
-from .forms import CartAddProductForm
+from .forms import CartAddProductForm, PRODUCT_QUANTITY_CHOICES
 from coupons.forms import CouponApplyForm
-from shop.recommender import Recommender
+from shop.recommender import recommender
 
 @require_POST
 def cart_add(request, product_id):
     cart = Cart(request)
-    product = get_object_or_404(Product, id=product_id)
+    product = get_object_or_404(Product.objects.only('id', 'price'),
+                                id=product_id)
     form = CartAddProductForm(request.POST)
     if form.is_valid():
         cd = form.cleaned_data
@@ -22,29 +23,26 @@ def cart_add(request, product_id):
 @require_POST
 def cart_remove(request, product_id):
     cart = Cart(request)
-    product = get_object_or_404(Product, id=product_id)
-    cart.remove(product)
+    cart.remove(product_id)
     return redirect('cart:cart_detail')
 
 
 def cart_detail(request):
     cart = Cart(request)
-    for item in cart:
-        item['update_quantity_form'] = CartAddProductForm(initial={
-                            'quantity': item['quantity'],
-                            'override': True})
+    items = list(cart)
     coupon_apply_form = CouponApplyForm()
 
-    r = Recommender()
-    cart_products = [item['product'] for item in cart]
-    if(cart_products):
-        recommended_products = r.suggest_products_for(cart_products,
-                                                      max_results=4)
-    else:
-        recommended_products = []
-        
+    cart_products = [item['product'] for item in items]
+    recommended_products = []
+    if cart_products:
+        recommended_products = recommender.suggest_products_for(
+                                   cart_products, max_results=4)
+
     context = {
         'cart': cart,
+        'items': items,
+        'quantity_choices': PRODUCT_QUANTITY_CHOICES,
         'coupon_apply_form': coupon_apply_form,
+        'recommended_products': recommended_products,
     }
     return render(request, 'cart/cart_detail.html', context)
@@ -14,6 +14,7 @@ import os
 from pathlib import Path
 from django.contrib.messages import constants as messages
 from dotenv import load_dotenv, find_dotenv
+from celery.schedules import crontab
 load_dotenv(find_dotenv())
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -179,6 +180,14 @@ ACCOUNT_LOGIN_ATTEMPTS_TIMEOUT = 10800
 # Celery settings
 CELERY_BROKER_URL = "redis://localhost:6379"
 CELERY_RESULT_BACKEND = "redis://localhost:6379"
+# run with: celery -A core beat -l info
+CELERY_BEAT_SCHEDULE = {
+    # store fresh recommendations on every product each night
+    'refresh-recommendations': {
+        'task': 'shop.tasks.refresh_recommendations',
+        'schedule': crontab(hour=3, minute=0),
+    },
+}
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -190,4 +199,19 @@ STRIPE_WEBHOOK_SECRET = os.environ.get("STRIPE_WEBHOOK_SECRET")
 
 REDIS_HOST = 'localhost'
 REDIS_PORT = 6379
-REDIS_DB = 1
\ No newline at end of file
+REDIS_DB = 1
+REDIS_CACHE_DB = 2
+
+# shared by all web and celery workers, so the signal handlers that
+# delete cached pages and objects invalidate them everywhere; acts as
+# an empty cache while redis is unreachable
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.FailSoftRedisCache',
+        'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_CACHE_DB}',
+        'OPTIONS': {
+            'socket_connect_timeout': 1,
+            'socket_timeout': 1,
+        },
+    }
+}
@@ -0,0 +1,20 @@
+# Generated by Django 4.1.13 on 2026-10-15 22:12
+
+from django.db import migrations
+from django.db.models.functions import Upper
+
+
+def uppercase_codes(apps, schema_editor):
+    Coupon = apps.get_model('coupons', 'Coupon')
+    Coupon.objects.update(code=Upper('code'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coupons', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(uppercase_codes, migrations.RunPython.noop),
+    ]
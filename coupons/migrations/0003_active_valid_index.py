@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-15 22:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coupons', '0002_uppercase_codes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coupon',
+            index=models.Index(fields=['active', 'valid_from', 'valid_to'], name='coupons_cou_active_57a44c_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-15 22:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coupons', '0003_active_valid_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coupon',
+            name='stripe_coupon_id',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -13,6 +13,35 @@ class Coupon(models.Model):
                                MaxValueValidator(100)],
                    help_text='Percentage vaule (0 to 100)')
     active = models.BooleanField()
+    # Stripe coupon created for the current discount
+    stripe_coupon_id = models.CharField(max_length=64,
+                                        blank=True,
+                                        editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['active', 'valid_from', 'valid_to']),
+        ]
 
     def __str__(self):
         return self.code
+
+    def clean(self):
+        # normalise before forms run the unique check on the code
+        self.code = self.code.upper()
+
+    def save(self, *args, **kwargs):
+        # store codes upper-cased so lookups can use the unique index
+        self.code = self.code.upper()
+        if self.pk and self.stripe_coupon_id:
+            # the Stripe coupon only matches the discount it was created with
+            discount = Coupon.objects.filter(pk=self.pk) \
+                                     .values_list('discount', flat=True) \
+                                     .first()
+            if discount != self.discount:
+                self.stripe_coupon_id = ''
+        super().save(*args, **kwargs)
+
+
+def coupon_cache_key(coupon_id):
+    return f'coupon:{coupon_id}'
@@ -0,0 +1,9 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Coupon, coupon_cache_key
+
+
+@receiver([post_save, post_delete], sender=Coupon)
+def invalidate_coupon_cache(sender, instance, **kwargs):
+    cache.delete(coupon_cache_key(instance.id))
@@ -11,12 +11,9 @@ def coupon_apply(request):
     form = CouponApplyForm(request.POST)
     if form.is_valid():
         code = form.cleaned_data['code']
-        try:
-            coupon = Coupon.objects.get(code__iexact=code,
-                                        valid_from__lte=now,
-                                        valid_to__gte=now,
-                                        active=True)
-            request.session['coupon_id'] = coupon.id
-        except Coupon.DoesNotExist:
-            request.session['coupon_id'] = None
+        coupon = Coupon.objects.filter(code=code.upper(),
+                                       valid_from__lte=now,
+                                       valid_to__gte=now,
+                                       active=True).first()
+        request.session['coupon_id'] = coupon.id if coupon else None
     return redirect('cart:cart_detail')
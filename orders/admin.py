@@ -2,9 +2,11 @@ import csv
 import datetime
 from django.http import HttpResponse
 from django.contrib import admin
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from .models import Order, OrderItem
+from .pdf import pdf_response
 
 
 def export_to_csv(modeladmin, request, queryset):
@@ -30,10 +32,21 @@ def export_to_csv(modeladmin, request, queryset):
 export_to_csv.short_description = 'Export to CSV'
 
 
+def export_to_pdf(modeladmin, request, queryset):
+    # render all invoices into one document so WeasyPrint runs once
+    html = render_to_string('orders/pdf_batch.html',
+                            {'orders': queryset.with_items()})
+    return pdf_response(html, 'orders.pdf')
+export_to_pdf.short_description = 'Export invoices to PDF'
+
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     raw_id_fields = ['product']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
 
 def order_payment(obj):
     url = obj.get_stripe_url()
@@ -62,4 +75,9 @@ class OrderAdmin(admin.ModelAdmin):
                     order_detail, order_pdf]
     list_filter = ['paid', 'created', 'updated']
     inlines = [OrderItemInline]
-    actions = [export_to_csv]
+    actions = [export_to_csv, export_to_pdf]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # items may have changed, refresh the stored total
+        form.instance.update_total()
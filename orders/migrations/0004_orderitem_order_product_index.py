@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-15 22:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_coupon_order_discount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['order', 'product'], name='orders_orde_order_i_52f79a_idx'),
+        ),
+    ]
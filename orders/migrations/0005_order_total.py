@@ -0,0 +1,36 @@
+# Generated by Django 4.1.13 on 2026-10-15 22:20
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def store_totals(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    orders = Order.objects.annotate(
+        total_before_discount=Sum(F('items__price') * F('items__quantity')))
+    for order in orders:
+        total = order.total_before_discount or Decimal(0)
+        total -= total * (order.discount / Decimal(100))
+        Order.objects.filter(pk=order.pk).update(
+            total=total.quantize(Decimal('0.01')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_orderitem_order_product_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(store_totals, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.CheckConstraint(check=models.Q(('total__gte', 0)), name='order_total_gte_0'),
+        ),
+    ]
@@ -1,11 +1,35 @@
 from decimal import Decimal
+from functools import lru_cache
 from django.core.validators import MinValueValidator, \
                                    MaxValueValidator
 from django.db import models
+from django.db.models import Sum, F
 from django.conf import settings
 from shop.models import Product
 from coupons.models import Coupon
 
+_HUNDRED = Decimal(100)
+_ZERO = Decimal(0)
+
+
+@lru_cache(maxsize=1)
+def _stripe_path():
+    if '_test_' in settings.STRIPE_SECRET_KEY:
+        # Stripe path for test payments
+        return '/test/'
+    # Stripe path for real payments
+    return '/'
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_items(self):
+        # load orders with their items and the items' products up front
+        return self.select_related('coupon').prefetch_related(
+            models.Prefetch('items',
+                            queryset=OrderItem.objects.select_related(
+                                'product')))
+
+
 class Order(models.Model):
 
     first_name = models.CharField(max_length=50)
@@ -26,39 +50,66 @@ class Order(models.Model):
     discount = models.IntegerField(default=0,
                                    validators=[MinValueValidator(0),
                                        MaxValueValidator(100)])
+    # total after discount, stored by update_total()
+    total = models.DecimalField(max_digits=12,
+                                decimal_places=2,
+                                default=0,
+                                editable=False)
+
+    objects = OrderQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created']
         indexes = [
             models.Index(fields=['-created']),
         ]
+        constraints = [
+            models.CheckConstraint(check=models.Q(total__gte=0),
+                                   name='order_total_gte_0'),
+        ]
 
     def __str__(self):
         return f'Order {self.id}'
 
     def get_total_cost_before_discount(self):
-        return sum(item.get_cost() for item in self.items.all())
+        # computed once per instance
+        if getattr(self, '_total_before_discount', None) is None:
+            if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+                # items already loaded, no need to query again
+                self._total_before_discount = sum(
+                    (item.get_cost() for item in self.items.all()), _ZERO)
+            else:
+                self._total_before_discount = self.items.aggregate(
+                    total=Sum(F('price') * F('quantity'),
+                              output_field=models.DecimalField(
+                                  max_digits=12, decimal_places=2))
+                )['total'] or _ZERO
+        return self._total_before_discount
 
     def get_discount(self):
-        total_cost = self.get_total_cost_before_discount()
         if self.discount:
-            return total_cost * (self.discount / Decimal(100))
-        return Decimal(0)
+            total_cost = self.get_total_cost_before_discount()
+            return total_cost * self.discount / _HUNDRED
+        return _ZERO
 
     def get_total_cost(self):
         total_cost = self.get_total_cost_before_discount()
         return total_cost - self.get_discount()
+
+    def update_total(self):
+        """
+        Recompute the total from the order items and store it.
+        Call it whenever the items of an order change.
+        """
+        self._total_before_discount = None
+        self.total = self.get_total_cost().quantize(Decimal('0.01'))
+        Order.objects.filter(pk=self.pk).update(total=self.total)
     
     def get_stripe_url(self):
         if not self.stripe_id:
             # no payment associated
             return ''
-        if '_test_' in settings.STRIPE_SECRET_KEY:
-            # Stripe path for test payments
-            path = '/test/'
-        else:
-            # Stripe path for real payments
-            path = '/'
+        path = _stripe_path()
         return f'https://dashboard.stripe.com{path}payments/{self.stripe_id}'
 
 class OrderItem(models.Model):
@@ -72,6 +123,11 @@ class OrderItem(models.Model):
                                 decimal_places=2)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', 'product']),
+        ]
+
     def __str__(self):
         return str(self.id)
 
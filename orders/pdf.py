@@ -0,0 +1,27 @@
+import io
+import os
+from functools import lru_cache
+from django.conf import settings
+from django.http import FileResponse
+import weasyprint
+
+
+@lru_cache(maxsize=1)
+def pdf_css():
+    # parse the invoice stylesheet once per process
+    return weasyprint.CSS(os.path.join(settings.STATIC_ROOT, 'css/pdf.css'))
+
+
+def write_pdf(html, target):
+    weasyprint.HTML(string=html).write_pdf(target,
+                                           stylesheets=[pdf_css()])
+
+
+def pdf_response(html, filename):
+    # render the PDF into a buffer and stream it out in chunks
+    buffer = io.BytesIO()
+    write_pdf(html, buffer)
+    buffer.seek(0)
+    return FileResponse(buffer,
+                        content_type='application/pdf',
+                        filename=filename)
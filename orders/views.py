@@ -1,18 +1,20 @@
 from django.urls import reverse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.admin.views.decorators import staff_member_required
-from django.conf import settings
-from django.http import HttpResponse
+from django.db import transaction
 from django.template.loader import render_to_string
-import weasyprint
 from .models import OrderItem, Order
 from .forms import OrderCreateForm
+from .pdf import pdf_response
 from .tasks import order_created
 from cart.cart import Cart
 
 
 def order_create(request):
     cart = Cart(request)
+    # load the items first, this also drops products that no longer
+    # exist before the count and totals are shown or stored
+    items = list(cart)
     if request.method == 'POST':
         form = OrderCreateForm(request.POST)
         if form.is_valid():
@@ -20,16 +22,23 @@ def order_create(request):
             if cart.coupon:
                 order.coupon = cart.coupon
                 order.discount = cart.coupon.discount
-            order.save()
-            for item in cart:
-                OrderItem.objects.create(order=order,
-                                        product=item['product'],
-                                        price=item['price'],
-                                        quantity=item['quantity'])
-            # clear the cart
-            cart.clear()
-            # launch asynchronous task
-            order_created.delay(order.id)
+            with transaction.atomic():
+                order.save()
+                # insert all order items in a single query
+                OrderItem.objects.bulk_create(
+                    [OrderItem(order=order,
+                               product=item['product'],
+                               price=item['price'],
+                               quantity=item['quantity'])
+                     for item in items],
+                    batch_size=100)
+                # store the order total
+                order.update_total()
+                # clear the cart
+                cart.clear()
+                # launch asynchronous task once the order is committed
+                transaction.on_commit(
+                    lambda order_id=order.id: order_created.delay(order_id))
             # set the order in the session
             request.session['order_id'] = order.id
             # redirect for payment
@@ -38,12 +47,12 @@ def order_create(request):
         form = OrderCreateForm()
     return render(request,
                   'orders/orders_create.html',
-                  {'cart': cart, 'form': form})
+                  {'cart': cart, 'items': items, 'form': form})
 
 
 @staff_member_required
 def admin_order_detail(request, order_id):
-    order = get_object_or_404(Order, id=order_id)
+    order = get_object_or_404(Order.objects.with_items(), id=order_id)
     return render(request,
                   'admin/orders/detail.html',
                   {'order': order})
@@ -51,11 +60,6 @@ def admin_order_detail(request, order_id):
 
 @staff_member_required
 def admin_order_pdf(request, order_id):
-    order = get_object_or_404(Order, id=order_id)
+    order = get_object_or_404(Order.objects.with_items(), id=order_id)
     html = render_to_string('orders/pdf.html',{'order': order})
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'filename=order_{order.id}.pdf'
-    weasyprint.HTML(string=html).write_pdf(response,
-        stylesheets=[weasyprint.CSS(
-            settings.STATIC_ROOT / 'css/pdf.css')])
-    return response
+    return pdf_response(html, f'order_{order.id}.pdf')
@@ -1,10 +1,9 @@
 from io import BytesIO
 from celery import shared_task
-import weasyprint
 from django.template.loader import render_to_string
 from django.core.mail import EmailMessage
-from django.conf import settings
 from orders.models import Order
+from orders.pdf import write_pdf
 
 
 @shared_task
@@ -24,9 +23,7 @@ def payment_completed(order_id):
     # generate PDF
     html = render_to_string('orders/pdf.html', {'order': order})
     out = BytesIO()
-    stylesheets=[weasyprint.CSS(settings.STATIC_ROOT + '/css/pdf.css')]
-    weasyprint.HTML(string=html).write_pdf(out,
-                                          stylesheets=stylesheets)
+    write_pdf(html, out)
     # attach PDF file
     email.attach(f'order_{order.id}.pdf',
                  out.getvalue(),
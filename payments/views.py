@@ -1,19 +1,29 @@
-from decimal import Decimal
+import requests
+from requests.adapters import HTTPAdapter
 import stripe
 from django.conf import settings
 from django.shortcuts import render, redirect, reverse,\
                              get_object_or_404
 from orders.models import Order
+from coupons.models import Coupon
 
 
 # create the Stripe instance
 stripe.api_key = settings.STRIPE_SECRET_KEY
 stripe.api_version = settings.STRIPE_API_VERSION
 
+# keep connections to the Stripe API open between requests
+stripe_session = requests.Session()
+stripe_session.mount('https://', HTTPAdapter(pool_connections=10,
+                                             pool_maxsize=50))
+stripe.default_http_client = stripe.http_client.RequestsClient(
+                                 session=stripe_session,
+                                 verify_ssl_certs=True)
+
 
 def payment_process(request):
     order_id = request.session.get('order_id', None)
-    order = get_object_or_404(Order, id=order_id)
+    order = get_object_or_404(Order.objects.with_items(), id=order_id)
 
     if request.method == 'POST':
         success_url = request.build_absolute_uri(
@@ -27,29 +37,36 @@ def payment_process(request):
             'client_reference_id': order.id,
             'success_url': success_url,
             'cancel_url': cancel_url,
-            'line_items': []
-        }
-        # add order items to the Stripe checkout session
-        for item in order.items.all():
-            session_data['line_items'].append({
+            # add order items to the Stripe checkout session
+            'line_items': [{
                 'price_data': {
-                    'unit_amount': int(item.price * Decimal('100')),
+                    'unit_amount': int(item.price * 100),
                     'currency': 'usd',
                     'product_data': {
                         'name': item.product.name,
                     },
                 },
                 'quantity': item.quantity,
-            })
+            } for item in order.items.all()]
+        }
 
         # Stripe coupon
         if order.coupon:
-            stripe_coupon = stripe.Coupon.create(
-                                name=order.coupon.code,
-                                percent_off=order.discount,
-                                duration='once')
+            coupon = order.coupon
+            # reuse the Stripe coupon created for this discount
+            if coupon.stripe_coupon_id and \
+                    coupon.discount == order.discount:
+                stripe_coupon_id = coupon.stripe_coupon_id
+            else:
+                stripe_coupon_id = stripe.Coupon.create(
+                                       name=coupon.code,
+                                       percent_off=order.discount,
+                                       duration='once').id
+                if coupon.discount == order.discount:
+                    Coupon.objects.filter(pk=coupon.pk).update(
+                        stripe_coupon_id=stripe_coupon_id)
             session_data['discounts'] = [{
-                'coupon': stripe_coupon.id
+                'coupon': stripe_coupon_id
             }]
 
         # create Stripe checkout session
@@ -59,7 +76,7 @@ def payment_process(request):
         return redirect(session.url, code=303)
 
     else:
-        return render(request, 'payments/process.html', locals())
+        return render(request, 'payments/process.html', {'order': order})
 
 
 def payment_completed(request):
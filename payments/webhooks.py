@@ -1,8 +1,11 @@
+import json
 import stripe
 from django.conf import settings
 from django.http import HttpResponse
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from orders.models import Order
+from shop.tasks import order_products_bought
 from .tasks import payment_completed
 
 
@@ -10,13 +13,15 @@ from .tasks import payment_completed
 def stripe_webhook(request):
     payload = request.body
     sig_header = request.META['HTTP_STRIPE_SIGNATURE']
-    event = None
 
     try:
-        event = stripe.Webhook.construct_event(
-                    payload,
-                    sig_header,
-                    settings.STRIPE_WEBHOOK_SECRET)
+        # check the signature only, without building a Stripe event
+        stripe.WebhookSignature.verify_header(
+            payload.decode('utf-8'),
+            sig_header,
+            settings.STRIPE_WEBHOOK_SECRET,
+            stripe.Webhook.DEFAULT_TOLERANCE)
+        event = json.loads(payload)
     except ValueError as e:
         # Invalid payload
         return HttpResponse(status=400)
@@ -24,19 +29,27 @@ def stripe_webhook(request):
         # Invalid signature
         return HttpResponse(status=400)
 
-    if event.type == 'checkout.session.completed':
-        session = event.data.object
-        if session.mode == 'payment' and session.payment_status == 'paid':
+    if event.get('type') == 'checkout.session.completed':
+        session = event['data']['object']
+        if session['mode'] == 'payment' and \
+                session['payment_status'] == 'paid':
             try:
-                order = Order.objects.get(id=session.client_reference_id)
-            except Order.DoesNotExist:
+                order_id = int(session['client_reference_id'])
+            except (TypeError, ValueError):
+                # session not created by payment_process
+                return HttpResponse(status=404)
+            # mark order as paid and store Stripe payment ID
+            # with a single UPDATE
+            updated = Order.objects.filter(id=order_id, paid=False).update(
+                          paid=True,
+                          stripe_id=session['payment_intent'],
+                          updated=timezone.now())
+            if updated:
+                # launch asynchronous tasks, once per order even
+                # when Stripe delivers the event again
+                payment_completed.delay(order_id)
+                order_products_bought.delay(order_id)
+            elif not Order.objects.filter(id=order_id).exists():
                 return HttpResponse(status=404)
-            # mark order as paid
-            order.paid = True
-            # store Stripe payment ID
-            order.stripe_id = session.payment_intent
-            order.save()
-            # launch asynchronous task
-            payment_completed.delay(order.id)
 
     return HttpResponse(status=200)
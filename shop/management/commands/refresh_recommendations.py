@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from shop.tasks import refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Store the current recommendations on every product'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--async', action='store_true',
+                            dest='run_async',
+                            help='Queue the refresh as a Celery task')
+
+    def handle(self, *args, **options):
+        if options['run_async']:
+            refresh_recommendations.delay()
+            self.stdout.write('Queued the recommendations refresh.')
+        else:
+            refresh_recommendations()
+            self.stdout.write(self.style.SUCCESS(
+                'Recommendations refreshed.'))
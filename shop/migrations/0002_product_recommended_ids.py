@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-15 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='recommended_ids',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
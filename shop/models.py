@@ -1,3 +1,6 @@
+import time
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
 from django.db import models
 from django.urls import reverse
 
@@ -30,6 +33,9 @@ class Product(models.Model):
     available = models.BooleanField(default=True)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
+    # best first, kept up to date by shop.tasks.refresh_recommendations
+    recommended_ids = models.JSONField(default=list, blank=True,
+                                       editable=False)
 
     class Meta:
         ordering = ['name']
@@ -44,3 +50,44 @@ class Product(models.Model):
     def get_absolute_url(self):
         return reverse('shop:product_detail', args=[self.id, self.slug])
 
+    def get_recommended_products(self):
+        products = Product.objects.in_bulk(self.recommended_ids)
+        return [products[id] for id in self.recommended_ids
+                if id in products]
+
+
+CATEGORIES_CACHE_KEY = 'shop:categories:all'
+# seconds each process reuses its own copy of the categories
+CATEGORIES_LOCAL_TIMEOUT = 60
+# (fetched at, categories) for this process
+local_categories = {}
+
+
+def get_categories(local=True):
+    """
+    Return all categories. With local, a copy kept in this process
+    for up to a minute is used before the shared cache.
+    """
+    fetched = local_categories.get('fetched')
+    if not local or fetched is None or \
+            time.monotonic() - fetched > CATEGORIES_LOCAL_TIMEOUT:
+        categories = cache.get_or_set(CATEGORIES_CACHE_KEY,
+                                      lambda: list(Category.objects.all()),
+                                      60 * 10)
+        local_categories.update(fetched=time.monotonic(),
+                                categories=categories)
+    return local_categories['categories']
+
+
+def product_list_cache_key(category_slug=None):
+    return f'shop:list:{category_slug or "all"}'
+
+
+def recommendations_cache_key(product_id):
+    return f'recs:list:{product_id}'
+
+
+def clear_cached_recommendations(product_id):
+    # the product page fragment and the list it is rendered from
+    cache.delete_many([make_template_fragment_key('recs', [product_id]),
+                       recommendations_cache_key(product_id)])
@@ -1,60 +1,100 @@
+import logging
+import time
+from itertools import permutations
 import redis
 from django.conf import settings
 from .models import Product
 
+logger = logging.getLogger(__name__)
 
-# connect to redis
-r = redis.Redis(host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
-                db=settings.REDIS_DB)
+# seconds to skip redis after an error
+REDIS_DOWN_TIMEOUT = 30
+
+
+# connect to redis, sharing one bounded pool of connections
+pool = redis.ConnectionPool(host=settings.REDIS_HOST,
+                            port=settings.REDIS_PORT,
+                            db=settings.REDIS_DB,
+                            max_connections=50)
+r = redis.Redis(connection_pool=pool)
+
+# combine the scores of several products into KEYS[1], drop the
+# products themselves and return the top ARGV[#ARGV] ids, atomically
+# and in a single round trip
+suggest_script = r.register_script("""
+local tmp = KEYS[1]
+redis.call('ZUNIONSTORE', tmp, #KEYS - 1, unpack(KEYS, 2))
+redis.call('ZREM', tmp, unpack(ARGV, 1, #ARGV - 1))
+local suggestions = redis.call('ZREVRANGE', tmp, 0,
+                               tonumber(ARGV[#ARGV]) - 1)
+redis.call('DEL', tmp)
+return suggestions
+""")
 
 
 class Recommender:
+    # until this time.monotonic() value redis is assumed down; kept
+    # in process, as the django cache itself lives in redis
+    down_until = 0
+
     def get_product_key(self, id):
         return f'product:{id}:purchased_with'
 
     def products_bought(self, products):
-        print(' r ############## ', r)
         product_ids = [p.id for p in products]
-        for product_id in product_ids:
-            for with_id in product_ids:
-                # get the other products bought with each product
-                if product_id != with_id:
-                    print(' product_id != with_id ############## ', product_id != with_id)
-                    # increment score for product purchased together
-                    r.zincrby(self.get_product_key(product_id),
-                              1,
-                              with_id)
+        # send all score increments in a single round trip
+        pipe = r.pipeline(transaction=False)
+        # get the other products bought with each product
+        for product_id, with_id in permutations(product_ids, 2):
+            # increment score for product purchased together
+            pipe.zincrby(self.get_product_key(product_id),
+                         1,
+                         with_id)
+        pipe.execute()
 
     def suggest_products_for(self, products, max_results=6):
-        print(' r in suggest_products_for ############## ', r)
+        if time.monotonic() < self.down_until:
+            return []
         product_ids = [p.id for p in products]
-        if len(products) == 1:
-            # only 1 product
+        try:
+            suggested_products_ids = self.suggested_ids(product_ids,
+                                                        max_results)
+        except redis.RedisError:
+            logger.warning('Redis unavailable, skipping recommendations',
+                           exc_info=True)
+            self.down_until = time.monotonic() + REDIS_DOWN_TIMEOUT
+            return []
+        # get suggested products and sort by order of appearance
+        position = {id: i for i, id in enumerate(suggested_products_ids)}
+        suggested_products = list(Product.objects.filter(id__in=suggested_products_ids))
+        suggested_products.sort(key=lambda x: position[x.id])
+        return suggested_products
+
+    def suggested_ids(self, product_ids, max_results=6):
+        if len(product_ids) == 1:
+            # only 1 product, let redis return just the top ids
             suggestions = r.zrange(
                              self.get_product_key(product_ids[0]),
-                             0, -1, desc=True)[:max_results]
+                             0, max_results - 1, desc=True)
         else:
             # generate a temporary key
             flat_ids = ''.join([str(id) for id in product_ids])
             tmp_key = f'tmp_{flat_ids}'
             # multiple products, combine scores of all products
-            # store the resulting sorted set in a temporary key
+            # in a temporary key, remove ids for the products the
+            # recommendation is for and get the best scored ids
             keys = [self.get_product_key(id) for id in product_ids]
-            r.zunionstore(tmp_key, keys)
-            # remove ids for the products the recommendation is for
-            r.zrem(tmp_key, *product_ids)
-            # get the product ids by their score, descendant sort
-            suggestions = r.zrange(tmp_key, 0, -1,
-                                   desc=True)[:max_results]
-            # remove the temporary key
-            r.delete(tmp_key)
-        suggested_products_ids = [int(id) for id in suggestions]
-        # get suggested products and sort by order of appearance
-        suggested_products = list(Product.objects.filter(id__in=suggested_products_ids))
-        suggested_products.sort(key=lambda x: suggested_products_ids.index(x.id))
-        return suggested_products
+            suggestions = suggest_script(keys=[tmp_key] + keys,
+                                         args=product_ids + [max_results])
+        return [int(id) for id in suggestions]
 
     def clear_purchases(self):
-        for id in Product.objects.values_list('id', flat=True):
-            r.delete(self.get_product_key(id))
+        # delete the keys server-side without reading the product table
+        pipe = r.pipeline(transaction=False)
+        for key in r.scan_iter(match=self.get_product_key('*'), count=500):
+            pipe.unlink(key)
+        pipe.execute()
+
+
+# the recommender keeps no state of its own, share one instance
+recommender = Recommender()
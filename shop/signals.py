@@ -0,0 +1,28 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import (Category, Product, CATEGORIES_CACHE_KEY,
+                     local_categories, product_list_cache_key,
+                     clear_cached_recommendations)
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product_list(sender, instance, **kwargs):
+    cache.delete_many([product_list_cache_key(),
+                       product_list_cache_key(instance.category.slug)])
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_recommendations(sender, instance, **kwargs):
+    clear_cached_recommendations(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_lists(sender, instance, **kwargs):
+    # every list page shows the categories; other processes drop
+    # their local copy within CATEGORIES_LOCAL_TIMEOUT
+    local_categories.clear()
+    slugs = list(Category.objects.values_list('slug', flat=True))
+    cache.delete_many([CATEGORIES_CACHE_KEY, product_list_cache_key(),
+                       product_list_cache_key(instance.slug)] +
+                      [product_list_cache_key(slug) for slug in slugs])
@@ -0,0 +1,41 @@
+from celery import shared_task
+from django.utils import timezone
+from .models import Product, clear_cached_recommendations
+from .recommender import recommender
+
+# number of suggestions stored on each product
+RECOMMENDED_PRODUCTS = 2
+
+
+@shared_task
+def order_products_bought(order_id):
+    """
+    Task to record the products of a paid order as bought
+    together, to feed the product recommendations.
+    """
+    products = list(Product.objects.filter(
+                        order_items__order_id=order_id).only('id').distinct())
+    recommender.products_bought(products)
+    refresh_recommendations([p.id for p in products])
+
+
+@shared_task
+def refresh_recommendations(product_ids=None):
+    """
+    Task to store the current suggestions on the given products,
+    or on all of them, so product pages don't need redis.
+    """
+    products = Product.objects.values_list('id', 'recommended_ids')
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+    for product_id, stored_ids in products.iterator():
+        recommended_ids = recommender.suggested_ids([product_id],
+                                                    RECOMMENDED_PRODUCTS)
+        if recommended_ids == stored_ids:
+            continue
+        # bump updated too, so revalidated product pages aren't 304;
+        # no save() as the product list pages don't need invalidating
+        Product.objects.filter(id=product_id).update(
+            recommended_ids=recommended_ids,
+            updated=timezone.now())
+        clear_cached_recommendations(product_id)
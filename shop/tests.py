@@ -1,7 +1,38 @@
-from django.test import TestCase
+from decimal import Decimal
+from django.test import TestCase, override_settings
+from .models import Category, Product
 
 # python -m celery -A django_celery worker
 # python -m celery -A core worker -l info
 # celery -A core worker -l info
 # celery -A core flower
 # 4242 4242 4242 4242
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'core.cache.FailSoftRedisCache',
+        # nothing listens here, every cache call fails
+        'LOCATION': 'redis://127.0.0.1:1/0',
+    }
+})
+class RedisDownTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Tea', slug='tea')
+        cls.product = Product.objects.create(category=category,
+                                             name='Green tea',
+                                             slug='green-tea',
+                                             price=Decimal('1.50'))
+
+    def test_product_list_renders(self):
+        for url in ['/', '/tea/']:
+            with self.assertLogs('core.cache', 'WARNING'):
+                response = self.client.get(url)
+            self.assertContains(response, 'Green tea')
+
+    def test_product_detail_renders(self):
+        with self.assertLogs('core.cache', 'WARNING'):
+            response = self.client.get(self.product.get_absolute_url())
+        self.assertContains(response, 'Green tea')
@@ -1,37 +1,110 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control
+from django.utils.functional import SimpleLazyObject
 from django.shortcuts import render, get_object_or_404
+from django.views.decorators.http import etag
 from cart.forms import CartAddProductForm
-from .models import Category, Product
-from .recommender import Recommender
+from .models import (Category, Product, get_categories,
+                     product_list_cache_key, recommendations_cache_key)
+
+# stands in for the per-visitor csrf token in the cached product list
+CSRF_PLACEHOLDER = b'__csrf_token__'
+
+# the add to cart form is never bound here, build it once
+CART_PRODUCT_FORM = CartAddProductForm()
+
+def is_shared_page(request):
+    # any cookie but the csrf one (session, messages, ...) can change
+    # what a page shows, so only such requests get the shared page
+    return set(request.COOKIES) <= {settings.CSRF_COOKIE_NAME}
 
 def product_list(request, category_slug=None):
+    # visitors without a session or messages all see the same page
+    # (empty cart, anonymous navbar), so the first page is cached
+    cacheable = is_shared_page(request) and 'page' not in request.GET
+    key = product_list_cache_key(category_slug)
+    if cacheable:
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content.replace(CSRF_PLACEHOLDER,
+                                                get_token(request).encode()))
     category = None
-    categories = Category.objects.all()
-    products = Product.objects.filter(available=True)
+    # a page stored in the shared cache must not be built from
+    # another process's possibly stale copy of the categories
+    categories = get_categories(local=not cacheable)
+    # plain rows with only the columns the listing template renders
+    products = Product.objects.filter(available=True).values(
+        'id', 'slug', 'name', 'price', 'image').order_by('name', 'id')
     if category_slug:
         category = get_object_or_404(Category, slug=category_slug)
         products = products.filter(category=category)
+    paginator = Paginator(products, 24)
+    page = paginator.get_page(request.GET.get('page'))
+    # rows have no FieldFile, ask the image storage for the url instead
+    image_storage = Product._meta.get_field('image').storage
+    for product in page:
+        product['image_url'] = image_storage.url(product['image']) \
+                               if product['image'] else ''
     context = {
         'category': category,
         'categories': categories,
-        'products': products
+        'products': page,
+        'page_obj': page,
+        'paginator': paginator,
+        'is_paginated': page.has_other_pages(),
     }
-    return render(request, 'shop/shop_list.html', context)
+    if cacheable:
+        csrf_token = context['csrf_token'] = get_token(request)
+    response = render(request, 'shop/shop_list.html', context)
+    if cacheable:
+        cache.set(key, response.content.replace(csrf_token.encode(),
+                                                CSRF_PLACEHOLDER), 60 * 5)
+    return response
+
+def product_etag(request, id, slug):
+    # only the shared anonymous page can be revalidated against the
+    # product; the csrf cookie is part of the tag because the page
+    # embeds a token that stops working once that cookie is rotated
+    if not is_shared_page(request):
+        return None
+    # the page also shows the category's name and links to its slug
+    row = Product.objects.filter(id=id, available=True) \
+                         .values_list('updated', 'category__slug',
+                                      'category__name').first()
+    if row is None:
+        return None
+    updated, category_slug, category_name = row
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    return hashlib.sha1(
+        f'{updated.isoformat()}:{category_slug}:{category_name}:'
+        f'{csrf_cookie}'.encode()).hexdigest()
 
+@etag(product_etag)
 def product_detail(request, id, slug):
-    product = get_object_or_404(Product,
+    product = get_object_or_404(Product.objects.select_related('category'),
                             id=id,
                             slug=slug,
                             available=True)
     
-    cart_product_form = CartAddProductForm()
-    r = Recommender()
-    recommended_products = r.suggest_products_for([product], 2)
-    print(' recommended_products r ############## ', r)
-    print(' recommended_products ############## ', recommended_products)
+    cart_product_form = CART_PRODUCT_FORM
+    # only evaluated when the cached "recs" fragment has to be rendered
+    recommended_products = SimpleLazyObject(
+        lambda: cache.get_or_set(
+                    recommendations_cache_key(product.id),
+                    product.get_recommended_products,
+                    60 * 5))
     context = {
         'product': product,
         'cart_product_form': cart_product_form,
         'recommended_products': recommended_products,
     }
-    return render(request,'shop/shop_detail.html',context)
+    response = render(request,'shop/shop_detail.html',context)
+    # browsers must revalidate, not reuse the page heuristically
+    patch_cache_control(response, no_cache=True)
+    return response
 